@@ -3,18 +3,53 @@ Configuration settings for the x-thread-dl tool.
 """
 
 import os
+import logging
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
 load_dotenv()
 
+def _positive_int_env(name: str, default: int) -> int:
+    """Read a positive integer from the environment, falling back to default on bad values."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        logging.getLogger('x-thread-dl.config').warning(
+            f"Ignoring invalid {name}={value!r} (expected a positive integer); using {default}"
+        )
+        return default
+    return parsed
+
 # Apify API token
 APIFY_API_TOKEN = os.getenv("APIFY_API_TOKEN")
 
 # Default settings
 DEFAULT_REPLY_LIMIT = 50
 DEFAULT_OUTPUT_DIR = "output"  # Base directory for all downloaded content
+# Worker threads for blocking I/O (Apify calls, yt-dlp downloads); override with XTHREAD_DL_WORKERS
+MAX_WORKER_THREADS = _positive_int_env("XTHREAD_DL_WORKERS", 32)
+# Videos downloaded in parallel; override with XTHREAD_DL_DOWNLOADS.
+# Each download occupies a worker thread, so this is capped at MAX_WORKER_THREADS.
+MAX_CONCURRENT_DOWNLOADS = min(_positive_int_env("XTHREAD_DL_DOWNLOADS", 8), MAX_WORKER_THREADS)
+# Fragments (HLS/DASH) fetched in parallel per video; override with XTHREAD_DL_FRAGMENTS
+CONCURRENT_FRAGMENT_DOWNLOADS = _positive_int_env("XTHREAD_DL_FRAGMENTS", 8)
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024  # Bytes per HTTP range request for single-file downloads
 
 # Apify actor IDs
 TWITTER_SCRAPER_ACTOR_ID = "u6ppkMWAx2E2MpEuF"  # For fetching tweets
 TWITTER_REPLIES_SCRAPER_ACTOR_ID = "qhybbvlFivx7AP0Oh"  # For fetching replies
+
+# Seconds between status checks while an Apify actor run is in progress
+APIFY_POLL_INTERVAL = 2
+# Maximum seconds to wait for an Apify actor run before aborting it; override with XTHREAD_DL_RUN_TIMEOUT
+APIFY_RUN_TIMEOUT = _positive_int_env("XTHREAD_DL_RUN_TIMEOUT", 15 * 60)
+
+# Cache for raw Apify scraping results (bypass with --no-cache)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "x-thread-dl")
+TWEET_CACHE_TTL = 24 * 60 * 60  # Seconds; original tweets rarely change
+REPLIES_CACHE_TTL = 60 * 60  # Seconds; new replies keep arriving
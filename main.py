@@ -17,13 +17,14 @@ import sys
 import asyncio
 import logging
 import click
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 # Import local modules
 import config
 from scraper import Scraper
 from thread_parser import parse_tweet_and_replies_data # Updated import
-from video_downloader import save_parsed_thread_data  # Updated import, was video_downloader
+from video_downloader import iter_save_parsed_thread_data  # Updated import, was video_downloader
 
 # Set up logging
 logging.basicConfig(
@@ -44,7 +45,8 @@ logger = logging.getLogger('x-thread-dl')
               help='Apify API token (can also be set as APIFY_API_TOKEN environment variable or in a .env file)')
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose (DEBUG level) output')
 @click.option('--list-formats', is_flag=True, help='List available video formats before downloading')
-def main(tweet_url: str, reply_limit: int, output_dir: str, apify_token: Optional[str], verbose: bool, list_formats: bool):
+@click.option('--no-cache', is_flag=True, help='Ignore cached scraping results and always query Apify')
+def main(tweet_url: str, reply_limit: int, output_dir: str, apify_token: Optional[str], verbose: bool, list_formats: bool, no_cache: bool):
     """
     Download media (videos and text) from X.com (Twitter) threads and replies.
 
@@ -73,16 +75,20 @@ def main(tweet_url: str, reply_limit: int, output_dir: str, apify_token: Optiona
     # The base output directory is passed; specific subdirs are created by save_parsed_thread_data
     # os.makedirs(output_dir, exist_ok=True) # This will be handled by save_parsed_thread_data's helpers
 
-    asyncio.run(process_thread_and_replies(tweet_url, reply_limit, output_dir, effective_api_token, list_formats))
+    asyncio.run(process_thread_and_replies(tweet_url, reply_limit, output_dir, effective_api_token, list_formats, verbose, use_cache=not no_cache))
 
-async def process_thread_and_replies(tweet_url: str, reply_limit: int, base_output_dir: str, api_token: str, list_formats: bool = False):
+async def process_thread_and_replies(tweet_url: str, reply_limit: int, base_output_dir: str, api_token: str, list_formats: bool = False, verbose: bool = False, use_cache: bool = True):
     """
     Process a tweet URL to fetch, parse, and save the thread and its replies.
     """
+    # All blocking work (Apify calls, yt-dlp downloads) runs via asyncio.to_thread,
+    # so size the default executor for I/O-bound work rather than CPU count
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=config.MAX_WORKER_THREADS))
+
     try:
         logger.info(f"Processing URL: {tweet_url}")
 
-        scraper_instance = Scraper(api_token=api_token)
+        scraper_instance = Scraper(api_token=api_token, use_cache=use_cache)
 
         logger.info(f"Fetching main tweet and up to {reply_limit} replies...")
         scraped_content = await scraper_instance.fetch_tweet_and_replies(tweet_url, reply_limit)
@@ -109,16 +115,17 @@ async def process_thread_and_replies(tweet_url: str, reply_limit: int, base_outp
         logger.info(f"Data parsed for user '{user_name}', thread '{tid}'.")
 
         logger.info(f"Saving content to base directory: {base_output_dir}")
-        saved_media_files = save_parsed_thread_data(parsed_data, base_output_dir, list_formats)
+        saved_media_files = []
+        async for file_path in iter_save_parsed_thread_data(parsed_data, base_output_dir, list_formats, verbose_info=verbose):
+            logger.info(f"  - Saved {file_path}")
+            saved_media_files.append(file_path)
 
         if not saved_media_files:
             logger.warning("No files were saved. This might be due to no content found or errors during saving/downloading.")
             # Decide if this is an error state or acceptable (e.g., thread with no videos/text worth saving)
             # For now, let's consider it a non-fatal warning if parsing was okay.
         else:
-            logger.info(f"Successfully saved {len(saved_media_files)} file(s):")
-            for file_path in saved_media_files:
-                logger.info(f"  - {file_path}")
+            logger.info(f"Successfully saved {len(saved_media_files)} file(s).")
 
             final_output_location = os.path.join(base_output_dir, user_name, tid)
             logger.info(f"All content for this thread saved under: {os.path.abspath(final_output_location)}")
@@ -3,10 +3,15 @@ Scraper module for the x-thread-dl tool.
 Handles fetching tweets and replies using the Apify API.
 """
 
-import asyncio
+import os
 import re
+import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, List, Any, Union
+import functools
+from typing import Optional, Dict, List, Any, Union, Tuple
 from apify_client import ApifyClient
 
 # Import configuration
@@ -14,27 +19,67 @@ import config
 
 # Set up logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO, # DEBUG is enabled by main.py with --verbose
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger('x-thread-dl.scraper')
 
+# Apify actor run statuses after which a run will not change anymore
+_TERMINAL_RUN_STATUSES = frozenset({"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"})
+
+# Pattern to match tweet IDs in X.com (Twitter) URLs
+_TWEET_ID_RE = re.compile(r'(?:twitter\.com|x\.com)/\w+/status/(\d+)')
+
+@functools.lru_cache(maxsize=None)
+def _get_apify_client(api_token: Optional[str]) -> ApifyClient:
+    """Return a shared Apify client for the given token so its HTTP session is reused."""
+    return ApifyClient(token=api_token)
+
+def _cache_path_for(actor_id: str, input_data: Dict[str, Any]) -> str:
+    """Return the cache file path for an actor run with the given input (URL, limit, ...)."""
+    key = hashlib.sha256(f"{actor_id}|{json.dumps(input_data, sort_keys=True)}".encode('utf-8')).hexdigest()
+    return os.path.join(config.CACHE_DIR, f"{key}.json")
+
+def _read_cached_items(cache_path: str, ttl: float) -> Optional[List[Dict[str, Any]]]:
+    """Load cached dataset items if the cache file exists and is younger than ttl seconds."""
+    try:
+        if time.time() - os.path.getmtime(cache_path) > ttl:
+            return None
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read cache file {cache_path}: {str(e)}")
+        return None
+
+def _write_cached_items(cache_path: str, items: List[Dict[str, Any]]):
+    """Save dataset items to the cache file."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False)
+    except Exception as e:
+        logger.warning(f"Could not write cache file {cache_path}: {str(e)}")
+
 class Scraper:
     """Class for scraping tweets and replies from X.com (Twitter)."""
 
-    def __init__(self, api_token: Optional[str] = None):
+    def __init__(self, api_token: Optional[str] = None, use_cache: bool = True):
         """
         Initialize the scraper with an Apify API token.
 
         Args:
             api_token (Optional[str]): The Apify API token. If None, uses the token from config.
+            use_cache (bool): Whether to reuse recent scraping results cached on disk.
         """
         self.api_token = api_token or config.APIFY_API_TOKEN
+        self.use_cache = use_cache
         if not self.api_token:
             logger.warning("No Apify API token provided. Scraping will likely fail.")
 
-        # Initialize the Apify client
-        self.client = ApifyClient(token=self.api_token)
+        # Reuse the Apify client (and its HTTP session) for this token
+        self.client = _get_apify_client(self.api_token)
 
     async def fetch_tweet(self, url: str) -> Optional[Dict[str, Any]]:
         """
@@ -69,17 +114,8 @@ class Scraper:
                 }
             }
 
-            # Use a separate thread for the blocking API call
-            loop = asyncio.get_event_loop()
-            run = await loop.run_in_executor(
-                None,
-                lambda: self.client.actor(config.TWITTER_SCRAPER_ACTOR_ID).call(run_input=input_data)
-            )
-
-            # Get the dataset items
-            dataset_items = await loop.run_in_executor(
-                None,
-                lambda: self.client.dataset(run["defaultDatasetId"]).list_items().items
+            dataset_items = await self._get_dataset_items(
+                config.TWITTER_SCRAPER_ACTOR_ID, input_data, config.TWEET_CACHE_TTL
             )
 
             if not dataset_items:
@@ -122,17 +158,8 @@ class Scraper:
                 "resultsLimit": limit
             }
 
-            # Use a separate thread for the blocking API call
-            loop = asyncio.get_event_loop()
-            run = await loop.run_in_executor(
-                None,
-                lambda: self.client.actor(config.TWITTER_REPLIES_SCRAPER_ACTOR_ID).call(run_input=input_data)
-            )
-
-            # Get the dataset items
-            dataset_items = await loop.run_in_executor(
-                None,
-                lambda: self.client.dataset(run["defaultDatasetId"]).list_items().items
+            dataset_items = await self._get_dataset_items(
+                config.TWITTER_REPLIES_SCRAPER_ACTOR_ID, input_data, config.REPLIES_CACHE_TTL
             )
 
             if not dataset_items:
@@ -143,11 +170,12 @@ class Scraper:
             logger.info(f"Successfully fetched {len(dataset_items)} replies from URL: {url}")
 
             # Debug: Log the keys of each reply object to diagnose tweet ID extraction issues
-            for i, reply in enumerate(dataset_items):
-                logger.debug(f"Reply {i} keys: {list(reply.keys())}")
-                # Debug: Log the full structure of the first reply to help diagnose author extraction issues
-                if i == 0:
-                    logger.debug(f"Reply 0 full structure: {reply}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, reply in enumerate(dataset_items):
+                    logger.debug(f"Reply {i} keys: {list(reply.keys())}")
+                    # Debug: Log the full structure of the first reply to help diagnose author extraction issues
+                    if i == 0:
+                        logger.debug(f"Reply 0 full structure: {reply}")
 
             return dataset_items
 
@@ -166,11 +194,12 @@ class Scraper:
         Returns:
             Dict[str, Any]: Dictionary containing the tweet and its replies
         """
-        # Fetch the tweet
-        tweet = await self.fetch_tweet(url)
-
-        # Fetch the replies
-        replies = await self.fetch_tweet_replies(url, reply_limit)
+        # Fetch the tweet and its replies concurrently; both run independent actors
+        # and handle their own errors (returning None), so gather won't raise here
+        tweet, replies = await asyncio.gather(
+            self.fetch_tweet(url),
+            self.fetch_tweet_replies(url, reply_limit)
+        )
 
         return {
             "tweet": tweet,
@@ -193,24 +222,23 @@ class Scraper:
                 variants = tweet_data['video']['variants']
 
                 # Log available variants for debugging
-                logger.debug(f"Found {len(variants)} video variants")
-                for i, variant in enumerate(variants):
-                    logger.debug(f"Variant {i}: type={variant.get('type')}, bitrate={variant.get('bitrate')}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Found {len(variants)} video variants")
+                    for i, variant in enumerate(variants):
+                        logger.debug(f"Variant {i}: type={variant.get('type')}, bitrate={variant.get('bitrate')}")
 
-                # Prefer MP4 format and sort by bitrate (highest first)
+                # Prefer MP4 format with the highest bitrate
                 mp4_variants = [v for v in variants if v.get('type') == 'video/mp4']
 
                 if mp4_variants:
-                    # Sort by bitrate if available, highest first for best quality
-                    mp4_variants.sort(key=lambda x: x.get('bitrate', 0), reverse=True)
-                    best_variant = mp4_variants[0]
+                    # Pick the highest bitrate if available for best quality
+                    best_variant = max(mp4_variants, key=lambda v: v.get('bitrate') or 0)
                     logger.info(f"Selected MP4 variant with bitrate: {best_variant.get('bitrate', 'unknown')}")
                     return best_variant.get('src')
 
-                # If no MP4 variants, sort all variants by bitrate and take the best
+                # If no MP4 variants, take the highest bitrate variant overall
                 if variants:
-                    variants.sort(key=lambda x: x.get('bitrate', 0), reverse=True)
-                    best_variant = variants[0]
+                    best_variant = max(variants, key=lambda v: v.get('bitrate') or 0)
                     logger.info(f"Selected variant (non-MP4) with bitrate: {best_variant.get('bitrate', 'unknown')}")
                     return best_variant.get('src')
 
@@ -221,24 +249,23 @@ class Scraper:
                         variants = media['video_info']['variants']
 
                         # Log available variants for debugging
-                        logger.debug(f"Found {len(variants)} video variants in mediaDetails")
-                        for i, variant in enumerate(variants):
-                            logger.debug(f"MediaDetails variant {i}: content_type={variant.get('content_type')}, bitrate={variant.get('bitrate')}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"Found {len(variants)} video variants in mediaDetails")
+                            for i, variant in enumerate(variants):
+                                logger.debug(f"MediaDetails variant {i}: content_type={variant.get('content_type')}, bitrate={variant.get('bitrate')}")
 
-                        # Prefer MP4 format and sort by bitrate (highest first)
+                        # Prefer MP4 format with the highest bitrate
                         mp4_variants = [v for v in variants if v.get('content_type') == 'video/mp4']
 
                         if mp4_variants:
-                            # Sort by bitrate if available, highest first for best quality
-                            mp4_variants.sort(key=lambda x: x.get('bitrate', 0), reverse=True)
-                            best_variant = mp4_variants[0]
+                            # Pick the highest bitrate if available for best quality
+                            best_variant = max(mp4_variants, key=lambda v: v.get('bitrate') or 0)
                             logger.info(f"Selected MP4 variant from mediaDetails with bitrate: {best_variant.get('bitrate', 'unknown')}")
                             return best_variant.get('url')
 
-                        # If no MP4 variants, sort all variants by bitrate and take the best
+                        # If no MP4 variants, take the highest bitrate variant overall
                         if variants:
-                            variants.sort(key=lambda x: x.get('bitrate', 0), reverse=True)
-                            best_variant = variants[0]
+                            best_variant = max(variants, key=lambda v: v.get('bitrate') or 0)
                             logger.info(f"Selected variant (non-MP4) from mediaDetails with bitrate: {best_variant.get('bitrate', 'unknown')}")
                             return best_variant.get('url')
 
@@ -248,6 +275,105 @@ class Scraper:
             logger.error(f"Error extracting video URL from tweet data: {str(e)}", exc_info=True)
             return None
 
+    async def _get_dataset_items(self, actor_id: str, input_data: Dict[str, Any], cache_ttl: float) -> List[Dict[str, Any]]:
+        """
+        Get the dataset items for an actor run, from the disk cache if a fresh entry exists.
+
+        Args:
+            actor_id (str): The Apify actor ID to run
+            input_data (Dict[str, Any]): The input for the actor run
+            cache_ttl (float): Maximum age in seconds of a usable cache entry
+
+        Returns:
+            List[Dict[str, Any]]: The dataset items produced by the run
+        """
+        cache_path = _cache_path_for(actor_id, input_data) if self.use_cache else None
+        if cache_path:
+            cached_items = await asyncio.to_thread(_read_cached_items, cache_path, cache_ttl)
+            if cached_items is not None:
+                logger.info(f"Using cached results for actor {actor_id} from {cache_path}")
+                return cached_items
+
+        dataset_items, status = await self._run_actor_and_fetch(actor_id, input_data)
+
+        # Only cache complete results: a failed, aborted or timed-out run may have left a
+        # partial dataset, and empty results are more likely a transient failure than a real answer
+        if cache_path and status == "SUCCEEDED" and dataset_items:
+            await asyncio.to_thread(_write_cached_items, cache_path, dataset_items)
+
+        return dataset_items
+
+    async def _run_actor_and_fetch(self, actor_id: str, input_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Run an Apify actor and fetch the items from its default dataset.
+
+        The run is started without waiting and then polled, so a worker thread is only
+        held for each short API request rather than for the whole (possibly minutes long) run.
+        Runs that did not succeed still have their (possibly partial) dataset returned;
+        the final status lets the caller decide what to do with it.
+
+        Args:
+            actor_id (str): The Apify actor ID to run
+            input_data (Dict[str, Any]): The input for the actor run
+
+        Returns:
+            Tuple[List[Dict[str, Any]], str]: The dataset items produced by the run and its final status
+        """
+        run = await asyncio.to_thread(self.client.actor(actor_id).start, run_input=input_data)
+        run = await self._wait_for_run(run)
+        status = run.get("status")
+
+        if status != "SUCCEEDED":
+            logger.warning(f"Actor run {run.get('id')} for actor {actor_id} finished with status {status}")
+
+        dataset_items = await asyncio.to_thread(self._list_dataset_items, run["defaultDatasetId"])
+        return dataset_items, status
+
+    async def _wait_for_run(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Poll an actor run until it reaches a terminal status.
+
+        Args:
+            run (Dict[str, Any]): The run object returned when the actor was started
+
+        Returns:
+            Dict[str, Any]: The final run object
+
+        Raises:
+            RuntimeError: If the run can no longer be found
+            TimeoutError: If the run does not finish within config.APIFY_RUN_TIMEOUT seconds (it is aborted first)
+        """
+        run_id = run["id"]
+        run_client = self.client.run(run_id)
+        deadline = time.monotonic() + config.APIFY_RUN_TIMEOUT
+        while run.get("status") not in _TERMINAL_RUN_STATUSES:
+            if time.monotonic() >= deadline:
+                # Stop the run on Apify's side too; otherwise it keeps running (and billing)
+                try:
+                    await asyncio.to_thread(run_client.abort)
+                    logger.info(f"Aborted actor run {run_id} after timeout")
+                except Exception as e:
+                    logger.warning(f"Could not abort timed-out actor run {run_id}: {str(e)}")
+                raise TimeoutError(f"Actor run {run_id} did not finish within {config.APIFY_RUN_TIMEOUT} seconds")
+            await asyncio.sleep(config.APIFY_POLL_INTERVAL)
+            run = await asyncio.to_thread(run_client.get)
+            if run is None:
+                raise RuntimeError(f"Actor run {run_id} not found")
+        return run
+
+    def _list_dataset_items(self, dataset_id: str) -> List[Dict[str, Any]]:
+        """
+        Fetch all items of an Apify dataset.
+        This is a blocking call and should be run in a separate thread.
+
+        Args:
+            dataset_id (str): The ID of the dataset
+
+        Returns:
+            List[Dict[str, Any]]: The dataset items
+        """
+        return self.client.dataset(dataset_id).list_items().items
+
     def _extract_tweet_id(self, url: str) -> Optional[str]:
         """
         Extract the tweet ID from an X.com (Twitter) URL.
@@ -259,15 +385,13 @@ class Scraper:
             Optional[str]: The tweet ID or None if extraction failed
         """
         try:
-            # Pattern to match tweet IDs in X.com (Twitter) URLs
-            pattern = r'(?:twitter\.com|x\.com)/\w+/status/(\d+)'
-            match = re.search(pattern, url)
+            match = _TWEET_ID_RE.search(url)
 
             if match:
                 return match.group(1)
 
             # Log the URL and pattern when no match is found
-            logger.debug(f"No tweet ID found in URL: {url} using pattern: {pattern}")
+            logger.debug(f"No tweet ID found in URL: {url} using pattern: {_TWEET_ID_RE.pattern}")
 
             return None
         except Exception as e:
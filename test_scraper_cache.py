@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the Apify results cache in the scraper.
+This script uses a fake Apify client, so it runs without an API token or network access.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import tempfile
+import contextlib
+
+import config
+from scraper import Scraper
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('test-scraper-cache')
+
+TEST_URL = "https://x.com/cline/status/1925002086405832987"
+
+class FakeApifyClient:
+    """Minimal stand-in for ApifyClient that finishes every run with a fixed status and dataset."""
+
+    def __init__(self, status="SUCCEEDED", items=None):
+        self.status = status
+        self.items = items if items is not None else [{"id": "reply-1"}]
+        self.start_count = 0
+
+    def actor(self, actor_id):
+        client = self
+
+        class _Actor:
+            def start(self, run_input=None):
+                client.start_count += 1
+                return {"id": "run-1", "status": client.status, "defaultDatasetId": "dataset-1"}
+
+        return _Actor()
+
+    def run(self, run_id):
+        client = self
+
+        class _Run:
+            def get(self):
+                return {"id": run_id, "status": client.status, "defaultDatasetId": "dataset-1"}
+
+        return _Run()
+
+    def dataset(self, dataset_id):
+        client = self
+
+        class _ListPage:
+            items = client.items
+
+        class _Dataset:
+            def list_items(self):
+                return _ListPage()
+
+        return _Dataset()
+
+@contextlib.contextmanager
+def temporary_cache_dir():
+    """Point config.CACHE_DIR at a fresh temporary directory for the duration of a test."""
+    original_cache_dir = config.CACHE_DIR
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config.CACHE_DIR = cache_dir
+        try:
+            yield cache_dir
+        finally:
+            config.CACHE_DIR = original_cache_dir
+
+def create_scraper(fake_client, use_cache=True):
+    """Create a scraper that talks to the given fake client."""
+    scraper = Scraper(api_token="test-token", use_cache=use_cache)
+    scraper.client = fake_client
+    return scraper
+
+def cache_files():
+    """List the files currently in the cache directory."""
+    if not os.path.isdir(config.CACHE_DIR):
+        return []
+    return [os.path.join(config.CACHE_DIR, name) for name in os.listdir(config.CACHE_DIR)]
+
+def test_cache_hit():
+    """A successful run is cached and reused by the next fetch."""
+    with temporary_cache_dir():
+        logger.info("Testing cache hit...")
+
+        fake_client = FakeApifyClient()
+        scraper = create_scraper(fake_client)
+
+        first = asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 5))
+        second = asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 5))
+
+        assert first == [{"id": "reply-1"}]
+        assert second == first
+        assert fake_client.start_count == 1
+        assert len(cache_files()) == 1
+
+        # A different limit is a different cache entry
+        asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 10))
+        assert fake_client.start_count == 2
+
+        # Bypassing the cache always runs the actor
+        uncached_scraper = create_scraper(fake_client, use_cache=False)
+        asyncio.run(uncached_scraper.fetch_tweet_replies(TEST_URL, 5))
+        assert fake_client.start_count == 3
+
+        logger.info("Cache hit test passed!")
+
+def test_cache_expiry():
+    """A cache entry older than its TTL is ignored and refreshed."""
+    with temporary_cache_dir():
+        logger.info("Testing cache expiry...")
+
+        fake_client = FakeApifyClient()
+        scraper = create_scraper(fake_client)
+
+        asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 5))
+        assert fake_client.start_count == 1
+
+        # Age every cache entry past the replies TTL
+        expired_time = time.time() - config.REPLIES_CACHE_TTL - 60
+        for cache_file in cache_files():
+            os.utime(cache_file, (expired_time, expired_time))
+
+        fake_client.items = [{"id": "reply-2"}]
+        refreshed = asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 5))
+
+        assert fake_client.start_count == 2
+        assert refreshed == [{"id": "reply-2"}]
+
+        logger.info("Cache expiry test passed!")
+
+def test_no_cache_on_failure():
+    """Partial results from a run that did not succeed are returned but not cached."""
+    with temporary_cache_dir():
+        logger.info("Testing that unsuccessful runs are not cached...")
+
+        fake_client = FakeApifyClient(status="TIMED-OUT", items=[{"id": "partial"}])
+        scraper = create_scraper(fake_client)
+
+        first = asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 5))
+        assert first == [{"id": "partial"}]
+        assert cache_files() == []
+
+        fake_client.status = "SUCCEEDED"
+        fake_client.items = [{"id": "reply-1"}, {"id": "reply-2"}]
+        second = asyncio.run(scraper.fetch_tweet_replies(TEST_URL, 5))
+
+        assert fake_client.start_count == 2
+        assert second == [{"id": "reply-1"}, {"id": "reply-2"}]
+
+        logger.info("No cache on failure test passed!")
+
+def main():
+    """Run all tests."""
+    logger.info("Starting scraper cache tests...")
+
+    # Test reusing a cached result
+    test_cache_hit()
+
+    # Test refreshing an expired result
+    test_cache_expiry()
+
+    # Test that unsuccessful runs are not cached
+    test_no_cache_on_failure()
+
+    logger.info("All tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,18 @@ and saving text content.
 
 import os
 import json
+import shutil
+import asyncio
 import logging
+import threading
 import yt_dlp
-from typing import Optional, Dict, List, Any
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Iterable, AsyncIterator
+
+try:
+    import orjson # Optional: much faster JSON encoding than the stdlib pretty-printer
+except ImportError:
+    orjson = None
 
 # Import configuration
 import config # To get DEFAULT_OUTPUT_DIR
@@ -20,18 +29,90 @@ logging.basicConfig(
 )
 logger = logging.getLogger('x-thread-dl.media_downloader') # Renamed logger
 
+# Base yt-dlp options for downloads; 'outtmpl' is filled in per video.
+# Enhanced format selection for better quality
+# Priority: 4K video + audio > best video + audio > best single file
+_YDL_DOWNLOAD_OPTS = {
+    'format': (
+        'bestvideo[height<=2160][ext=mp4]+bestaudio[ext=m4a]/'  # 4K MP4 + M4A audio
+        'bestvideo[ext=mp4]+bestaudio[ext=m4a]/'                # Best MP4 + M4A audio
+        'best[ext=mp4]/'                                        # Best single MP4 file
+        'best'                                                  # Fallback to any best format
+    ),
+    'quiet': False, # Set to False to see yt-dlp output, True for silent
+    'no_warnings': False,
+    'ignoreerrors': True,
+    'nooverwrites': False, # Allow overwriting for retries or updates
+    'retries': 5,
+    'logger': logger, # Pass our logger to yt-dlp
+    'merge_output_format': 'mp4',  # Ensure final output is MP4
+    'concurrent_fragment_downloads': config.CONCURRENT_FRAGMENT_DOWNLOADS, # Parallel HLS/DASH fragments
+    'http_chunk_size': config.HTTP_CHUNK_SIZE, # Download single files in ranged chunks
+    # Consider adding user agent if facing blocks:
+    # 'http_headers': {'User-Agent': 'Mozilla/5.0 ...'}
+}
+
+# Video URL -> path of a file already downloaded from it during this run.
+# Lets duplicate videos (quote tweets, mirrored replies) be linked instead of re-downloaded.
+_DOWNLOAD_CACHE: Dict[str, str] = {}
+_DOWNLOAD_LOCKS: Dict[str, threading.Lock] = {}
+_DOWNLOAD_LOCKS_GUARD = threading.Lock()
+
+def _get_download_lock(video_url: str) -> threading.Lock:
+    """Return the lock serializing downloads of the given video URL."""
+    with _DOWNLOAD_LOCKS_GUARD:
+        return _DOWNLOAD_LOCKS.setdefault(video_url, threading.Lock())
+
+def _reuse_cached_download(video_url: str, output_path: str) -> Optional[str]:
+    """
+    Place a previously downloaded copy of video_url at output_path, if one exists.
+
+    Hardlinks the cached file, falling back to a copy (e.g. across devices).
+
+    Returns:
+        Optional[str]: output_path if the cached file was reused, otherwise None.
+    """
+    cached_path = _DOWNLOAD_CACHE.get(video_url)
+    if not cached_path or not os.path.exists(cached_path):
+        return None
+    if os.path.abspath(cached_path) == os.path.abspath(output_path):
+        return output_path
+    try:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(cached_path, output_path)
+        except OSError:
+            shutil.copyfile(cached_path, output_path)
+        logger.info(f"Reused already downloaded video {cached_path} for {output_path}")
+        return output_path
+    except OSError as e:
+        logger.warning(f"Could not reuse cached video {cached_path} for {output_path}: {e}")
+        return None
+
 def _ensure_dir_exists(dir_path: str):
-    """Ensure directory exists, creating it if necessary."""
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-        logger.debug(f"Created directory: {dir_path}")
+    """Ensure directory exists, creating it if necessary (safe under concurrent calls)."""
+    os.makedirs(dir_path, exist_ok=True)
 
-def _save_json_content(data: Dict[str, Any], file_path: str):
-    """Saves dictionary data as JSON to the specified file path."""
+def _ensure_dirs_exist(dir_paths: Iterable[str]):
+    """Ensure all given directories exist. Blocking; meant to be run in a worker thread."""
+    for dir_path in dir_paths:
+        _ensure_dir_exists(dir_path)
+
+def _save_json_content(data: Dict[str, Any], file_path: str, ensure_dir: bool = True):
+    """
+    Saves dictionary data as JSON to the specified file path.
+    Pass ensure_dir=False when the parent directory is known to exist already.
+    """
     try:
-        _ensure_dir_exists(os.path.dirname(file_path))
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        if ensure_dir:
+            _ensure_dir_exists(os.path.dirname(file_path))
+        # Encode to UTF-8 bytes up front and write them in one go, skipping the text-mode file layer
+        if orjson is not None:
+            encoded = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+        else:
+            encoded = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        Path(file_path).write_bytes(encoded)
         logger.info(f"Successfully saved JSON content to {file_path}")
     except Exception as e:
         logger.error(f"Error saving JSON content to {file_path}: {str(e)}", exc_info=True)
@@ -74,7 +155,62 @@ def list_video_formats(video_url: str) -> Optional[List[Dict[str, Any]]]:
         logger.error(f"Error listing formats for {video_url}: {str(e)}", exc_info=True)
         return None
 
-def download_video_content(video_url: str, video_id: str, output_dir: str, list_formats: bool = False) -> Optional[str]:
+def _download_with_ytdlp(video_url: str, video_id: str, output_path: str, list_formats: bool = False, verbose_info: bool = False) -> Optional[str]:
+    """
+    Download a single video to output_path with yt-dlp.
+    Errors are left to the caller (download_video_content) to handle.
+
+    Returns:
+        Optional[str]: output_path if the download produced a non-empty file, otherwise None.
+    """
+    logger.info(f"Downloading video from {video_url} to {output_path}")
+
+    ydl_opts = {**_YDL_DOWNLOAD_OPTS, 'outtmpl': output_path}
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        # Extract the video info once and reuse it for logging and for the download
+        # itself, rather than letting ydl.download() extract it again
+        info = ydl.extract_info(video_url, download=False)
+        if info:
+            formats = info.get('formats') or []
+            if list_formats and formats:
+                logger.info(f"Available formats for video {video_id}:")
+                for fmt in formats[:10]:  # Show first 10 formats
+                    logger.info(f"  {fmt.get('format_id', 'N/A')}: {fmt.get('height', 'N/A')}p "
+                              f"{fmt.get('ext', 'N/A')} {fmt.get('tbr', 'N/A')}kbps")
+            if verbose_info:
+                if 'format' in info:
+                    logger.info(f"Selected format for {video_id}: {info.get('format', 'Unknown')}")
+                if 'height' in info:
+                    logger.info(f"Video resolution: {info.get('height', 'Unknown')}p")
+                if 'tbr' in info:
+                    logger.info(f"Total bitrate: {info.get('tbr', 'Unknown')} kbps")
+
+            # Download the video
+            ydl.process_ie_result(info, download=True)
+        else:
+            # yt-dlp with ignoreerrors returns None instead of raising on extraction failure
+            logger.warning(f"Could not extract video info for {video_id} from {video_url}")
+
+    try:
+        size = os.stat(output_path).st_size
+    except FileNotFoundError:
+        size = 0
+
+    if size > 0:
+        file_size = size / (1024 * 1024)  # Size in MB
+        logger.info(f"Successfully downloaded video to {output_path} ({file_size:.1f} MB)")
+        return output_path
+    else:
+        # yt-dlp with ignoreerrors might not raise an exception but still fail
+        logger.warning(f"Video file not found or empty after download attempt: {output_path}")
+        # Check if a .part file exists, indicating an interrupted download
+        part_file = output_path + ".part"
+        if os.path.exists(part_file):
+            logger.warning(f"Partial download file found: {part_file}. Download may have been interrupted.")
+        return None
+
+def download_video_content(video_url: str, video_id: str, output_dir: str, list_formats: bool = False, verbose_info: bool = False) -> Optional[str]:
     """
     Download a single video using yt-dlp with enhanced quality options.
     The filename will be {video_id}.mp4.
@@ -84,6 +220,7 @@ def download_video_content(video_url: str, video_id: str, output_dir: str, list_
         video_id (str): The ID of the tweet/reply containing the video (used for filename).
         output_dir (str): The directory to save the video to.
         list_formats (bool): Whether to list available formats before downloading.
+        verbose_info (bool): Whether to log the selected format before downloading.
 
     Returns:
         Optional[str]: The path to the downloaded video or None if download failed.
@@ -94,74 +231,28 @@ def download_video_content(video_url: str, video_id: str, output_dir: str, list_
         output_filename = f"{video_id}.mp4"
         output_path = os.path.join(output_dir, output_filename)
 
-        logger.info(f"Downloading video from {video_url} to {output_path}")
-
-        # List formats if requested
-        if list_formats:
-            formats = list_video_formats(video_url)
-            if formats:
-                logger.info(f"Available formats for video {video_id}:")
-                for fmt in formats[:10]:  # Show first 10 formats
-                    logger.info(f"  {fmt.get('format_id', 'N/A')}: {fmt.get('height', 'N/A')}p "
-                              f"{fmt.get('ext', 'N/A')} {fmt.get('tbr', 'N/A')}kbps")
-
-        # Enhanced format selection for better quality
-        # Priority: 4K video + audio > best video + audio > best single file
-        ydl_opts = {
-            'format': (
-                'bestvideo[height<=2160][ext=mp4]+bestaudio[ext=m4a]/'  # 4K MP4 + M4A audio
-                'bestvideo[ext=mp4]+bestaudio[ext=m4a]/'                # Best MP4 + M4A audio
-                'best[ext=mp4]/'                                        # Best single MP4 file
-                'best'                                                  # Fallback to any best format
-            ),
-            'outtmpl': output_path,
-            'quiet': False, # Set to False to see yt-dlp output, True for silent
-            'no_warnings': False,
-            'ignoreerrors': True,
-            'nooverwrites': False, # Allow overwriting for retries or updates
-            'retries': 5,
-            'logger': logger, # Pass our logger to yt-dlp
-            'merge_output_format': 'mp4',  # Ensure final output is MP4
-            # Consider adding user agent if facing blocks:
-            # 'http_headers': {'User-Agent': 'Mozilla/5.0 ...'}
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract info to log selected format
-            try:
-                info = ydl.extract_info(video_url, download=False)
-                if info:
-                    if 'format' in info:
-                        logger.info(f"Selected format for {video_id}: {info.get('format', 'Unknown')}")
-                    if 'height' in info:
-                        logger.info(f"Video resolution: {info.get('height', 'Unknown')}p")
-                    if 'tbr' in info:
-                        logger.info(f"Total bitrate: {info.get('tbr', 'Unknown')} kbps")
-            except Exception as e:
-                logger.debug(f"Could not extract format info: {e}")
-
-            # Download the video
-            ydl.download([video_url])
+        # Serialize downloads of the same URL so duplicates hit the cache instead of the CDN
+        with _get_download_lock(video_url):
+            cached_path = _reuse_cached_download(video_url, output_path)
+            if cached_path:
+                return cached_path
 
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-            file_size = os.path.getsize(output_path) / (1024 * 1024)  # Size in MB
-            logger.info(f"Successfully downloaded video to {output_path} ({file_size:.1f} MB)")
-            return output_path
-        else:
-            # yt-dlp with ignoreerrors might not raise an exception but still fail
-            logger.warning(f"Video file not found or empty after download attempt: {output_path}")
-            # Check if a .part file exists, indicating an interrupted download
-            part_file = output_path + ".part"
-            if os.path.exists(part_file):
-                logger.warning(f"Partial download file found: {part_file}. Download may have been interrupted.")
-            return None
+            downloaded_path = _download_with_ytdlp(video_url, video_id, output_path, list_formats, verbose_info)
+            if downloaded_path:
+                _DOWNLOAD_CACHE[video_url] = downloaded_path
+            return downloaded_path
 
     except Exception as e:
         # This catches errors during yt-dlp instantiation or other unexpected issues
         logger.error(f"Error downloading video {video_id} from {video_url}: {str(e)}", exc_info=True)
         return None
 
-def save_parsed_thread_data(parsed_data: Dict[str, Any], base_output_dir: str = config.DEFAULT_OUTPUT_DIR, list_formats: bool = False) -> List[str]:
+async def _download_video_limited(semaphore: asyncio.Semaphore, video_url: str, video_id: str, output_dir: str, list_formats: bool = False, verbose_info: bool = False) -> Optional[str]:
+    """Run a blocking video download in a worker thread, bounded by the given semaphore."""
+    async with semaphore:
+        return await asyncio.to_thread(download_video_content, video_url, video_id, output_dir, list_formats, verbose_info)
+
+async def iter_save_parsed_thread_data(parsed_data: Dict[str, Any], base_output_dir: str = config.DEFAULT_OUTPUT_DIR, list_formats: bool = False, verbose_info: bool = False) -> AsyncIterator[str]:
     """
     Saves all parsed thread data (text and videos) according to the structured format:
     output/{user_screen_name}/{thread_id}/thread_text.json
@@ -169,46 +260,65 @@ def save_parsed_thread_data(parsed_data: Dict[str, Any], base_output_dir: str =
     output/{user_screen_name}/{thread_id}/replies/{reply_id}/reply_text.json
     output/{user_screen_name}/{thread_id}/replies/{reply_id}/videos/{reply_id}.mp4
 
+    Text files are written as they are encountered; videos are downloaded concurrently
+    (at most config.MAX_CONCURRENT_DOWNLOADS at a time) once all downloads are queued.
+    Each path is yielded as soon as the file has been saved or its download has finished.
+
     Args:
         parsed_data (Dict[str, Any]): The structured data from thread_parser.
         base_output_dir (str): The base directory for all output (e.g., "output").
+        list_formats (bool): Whether to list available formats before each download.
+        verbose_info (bool): Whether to log the selected format of each video before downloading.
 
-    Returns:
-        List[str]: List of paths to all successfully saved/downloaded files.
+    Yields:
+        str: Path of each successfully saved/downloaded file.
     """
     if not parsed_data:
         logger.warning("No parsed data provided to save.")
-        return []
+        return
 
     user_screen_name = parsed_data.get("user_screen_name", "unknown_user")
     thread_id = parsed_data.get("thread_id", "unknown_thread")
 
     # Path for the current thread: output/{user_screen_name}/{thread_id}/
     thread_path = os.path.join(base_output_dir, user_screen_name, thread_id)
-    _ensure_dir_exists(thread_path)
-
-    saved_files = []
+    replies_base_path = os.path.join(thread_path, "replies")
+    # Reply paths are built by plain concatenation onto this prefix; reply IDs are
+    # numeric, so os.path.join's extra handling isn't needed in the per-reply loop
+    reply_path_prefix = replies_base_path + os.sep
+
+    # Create the thread and all reply directories in one pass, off the event loop
+    # (video directories are created by the download workers themselves)
+    required_dirs = {thread_path}
+    required_dirs.update(
+        f"{reply_path_prefix}{reply_info['reply_id']}"
+        for reply_info in parsed_data.get("replies", [])
+        if reply_info.get("reply_id")
+    )
+    await asyncio.to_thread(_ensure_dirs_exist, required_dirs)
+
+    saved_count = 0
+    semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_DOWNLOADS)
+    download_tasks = []
 
     # 1. Save main thread text content
     thread_text_content = parsed_data.get("thread_text_content")
     if thread_text_content:
         thread_text_path = os.path.join(thread_path, "thread_text.json")
-        _save_json_content(thread_text_content, thread_text_path)
-        saved_files.append(thread_text_path)
+        _save_json_content(thread_text_content, thread_text_path, ensure_dir=False)
+        saved_count += 1
+        yield thread_text_path
 
-    # 2. Download main thread videos
+    # 2. Queue main thread videos
     thread_videos_path = os.path.join(thread_path, "videos")
     for video_info in parsed_data.get("thread_videos", []):
         video_url = video_info.get("video_url")
         # Use main thread_id for its videos, as video_info.tweet_id is the same
         video_id_for_filename = thread_id
         if video_url and video_id_for_filename:
-            downloaded_path = download_video_content(video_url, video_id_for_filename, thread_videos_path, list_formats=list_formats)
-            if downloaded_path:
-                saved_files.append(downloaded_path)
+            download_tasks.append(_download_video_limited(semaphore, video_url, video_id_for_filename, thread_videos_path, list_formats, verbose_info))
 
     # 3. Process replies
-    replies_base_path = os.path.join(thread_path, "replies")
     for reply_info in parsed_data.get("replies", []):
         reply_id = reply_info.get("reply_id")
         if not reply_id:
@@ -216,26 +326,56 @@ def save_parsed_thread_data(parsed_data: Dict[str, Any], base_output_dir: str =
             continue
 
         # Path for the current reply: .../{thread_id}/replies/{reply_id}/
-        current_reply_path = os.path.join(replies_base_path, reply_id)
-        _ensure_dir_exists(current_reply_path)
+        current_reply_path = f"{reply_path_prefix}{reply_id}"
 
         # 3a. Save reply text content
         reply_text_content = reply_info.get("reply_text_content")
         if reply_text_content:
-            reply_text_path = os.path.join(current_reply_path, "reply_text.json")
-            _save_json_content(reply_text_content, reply_text_path)
-            saved_files.append(reply_text_path)
+            reply_text_path = f"{current_reply_path}{os.sep}reply_text.json"
+            _save_json_content(reply_text_content, reply_text_path, ensure_dir=False)
+            saved_count += 1
+            yield reply_text_path
 
-        # 3b. Download reply videos
-        reply_videos_path = os.path.join(current_reply_path, "videos")
+        # 3b. Queue reply videos
+        reply_videos_path = f"{current_reply_path}{os.sep}videos"
         for video_info in reply_info.get("reply_videos", []):
             video_url = video_info.get("video_url")
             # video_info.tweet_id here is actually the reply_id
             video_id_for_filename = video_info.get("tweet_id", reply_id)
             if video_url and video_id_for_filename:
-                downloaded_path = download_video_content(video_url, video_id_for_filename, reply_videos_path, list_formats=list_formats)
+                download_tasks.append(_download_video_limited(semaphore, video_url, video_id_for_filename, reply_videos_path, list_formats, verbose_info))
+
+    # 4. Download all queued videos concurrently
+    if download_tasks:
+        logger.info(f"Downloading {len(download_tasks)} video(s) with up to {config.MAX_CONCURRENT_DOWNLOADS} concurrent downloads")
+        running_tasks = [asyncio.create_task(download) for download in download_tasks]
+        try:
+            for next_download in asyncio.as_completed(running_tasks):
+                try:
+                    downloaded_path = await next_download
+                except Exception as e:
+                    logger.error(f"Video download task failed: {str(e)}", exc_info=True)
+                    continue
                 if downloaded_path:
-                    saved_files.append(downloaded_path)
+                    saved_count += 1
+                    yield downloaded_path
+        finally:
+            # If the consumer stopped early (break, aclose()), don't leave downloads running.
+            # Queued downloads are dropped; ones already in a worker thread finish that file only.
+            pending_tasks = [task for task in running_tasks if not task.done()]
+            for task in pending_tasks:
+                task.cancel()
+            if pending_tasks:
+                await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+    logger.info(f"Finished processing and saving data for thread {user_screen_name}/{thread_id}. Total files saved/downloaded: {saved_count}")
+
+async def save_parsed_thread_data(parsed_data: Dict[str, Any], base_output_dir: str = config.DEFAULT_OUTPUT_DIR, list_formats: bool = False, verbose_info: bool = False) -> List[str]:
+    """
+    Saves all parsed thread data and returns the saved paths once everything is done.
+    See iter_save_parsed_thread_data for the directory layout and to receive paths as they complete.
 
-    logger.info(f"Finished processing and saving data for thread {user_screen_name}/{thread_id}. Total files saved/downloaded: {len(saved_files)}")
-    return saved_files
+    Returns:
+        List[str]: List of paths to all successfully saved/downloaded files.
+    """
+    return [path async for path in iter_save_parsed_thread_data(parsed_data, base_output_dir, list_formats, verbose_info)]